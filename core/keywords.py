@@ -0,0 +1,103 @@
+"""
+This module provides a KeywordMatcher class that finds banned keywords inside a prompt.
+All keywords are compiled once (when the policy is loaded) into a single regex alternation (short lists)
+or a single Aho-Corasick automaton (long lists), so a prompt is scanned in one pass.
+The automaton comes from ahocorasick_rs (Rust, contiguous memory) when installed, else from pyahocorasick.
+"""
+
+import re
+from typing import List, Optional
+
+try:
+    # NOTE: Rust automaton stored in flat arrays (no per node Python objects), ~3x faster scans than pyahocorasick
+    import ahocorasick_rs
+    HAS_AHOCORASICK_RS = True
+except ImportError:
+    HAS_AHOCORASICK_RS = False
+
+try:
+    # NOTE: Optional fallback (not in requirements.txt), only used when ahocorasick_rs can't take the list
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
+# Below this many keywords, one compiled regex alternation (scanned in C by `re`)
+# is cheaper than building and iterating the automaton
+SMALL_KEYWORD_LIST = 16
+
+
+class KeywordMatcher:
+    """Case-insensitive substring matcher for the banned keywords list."""
+
+    def __init__(self, keywords: List[str]):
+        """Pre-lower the keywords and build the regex (short lists) or the automaton (long lists)."""
+        self.keywords = list(keywords)
+
+        # Lowercase once here instead of on every prompt, and remember where each keyword sits in the
+        # policy list (used to order the hits). Case-variant duplicates share one entry.
+        self._positions = {}
+        for index, keyword in enumerate(self.keywords):
+            self._positions.setdefault(keyword.lower(), []).append(index)
+        # Unique lowered keywords, in policy order
+        self._unique = tuple(self._positions)
+
+        self._regex = None
+        self._automaton = None
+        # ahocorasick_rs automaton, its pattern indexes point into self._unique
+        self._rs_automaton = None
+
+        if not self.keywords:
+            return
+
+        if len(self.keywords) < SMALL_KEYWORD_LIST:
+            self._regex = re.compile("|".join(re.escape(lowered) for lowered in self._unique))
+
+        elif HAS_AHOCORASICK_RS and all(self._unique):
+            # NOTE: ahocorasick_rs rejects empty patterns (kept on the other matchers, where "" matches everything)
+            self._rs_automaton = ahocorasick_rs.AhoCorasick(self._unique, store_patterns=False)
+
+        elif HAS_AHOCORASICK:
+            self._automaton = ahocorasick.Automaton()
+            for lowered in self._unique:
+                self._automaton.add_word(lowered, lowered)
+            self._automaton.make_automaton()
+
+    def find(self, prompt: str, prompt_lower: Optional[str] = None) -> List[str]:
+        """
+        Return the banned keywords found in the prompt (case-insensitive).
+        The result keeps the order of the policy file so the block reason stays stable.
+        NOTE: Pass prompt_lower when the caller already has prompt.lower(), so it isn't computed twice.
+        """
+        haystack = prompt.lower() if prompt_lower is None else prompt_lower
+
+        if self._regex is not None:
+            # Fast path: a single C-level scan tells us if there is any hit at all
+            if self._regex.search(haystack) is None:
+                return []
+            # Rare (block) path: list every keyword, including overlapping ones, for the reason
+            hits = [lowered for lowered in self._unique if lowered in haystack]
+
+        elif self._rs_automaton is not None:
+            # Every (overlapping) hit in one pass, as (pattern index, start, end)
+            hits = {self._unique[index] for index, _, _ in
+                    self._rs_automaton.find_matches_as_indexes(haystack, overlapping=True)}
+
+        elif self._automaton is None:
+            # Fallback: one substring scan per (unique) keyword
+            # NOTE: str `in` already runs CPython's C fastsearch. Searching encoded bytes instead measured ~3x
+            # slower (bytes containment goes through the buffer protocol), so the lowered str is searched.
+            hits = [lowered for lowered in self._unique if lowered in haystack]
+
+        else:
+            # NOTE: The automaton yields (end_index, value) for every (overlapping) hit in a single pass
+            hits = {lowered for _, lowered in self._automaton.iter(haystack)}
+
+        if not hits:
+            return []
+        return self._ordered(hits)
+
+    def _ordered(self, hits) -> List[str]:
+        """Map lowered hits back to the policy keywords, in policy order (touches only the hits)."""
+        indexes = sorted(index for lowered in hits for index in self._positions[lowered])
+        return [self.keywords[index] for index in indexes]
@@ -3,26 +3,48 @@ This module provides a Policy class that loads policy rules from a JSON file
 The policy will decide which action priority is best suitable for the prompt - block, redact or allow
 """
 
-import json
+import threading
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Any, Optional
-from .redactors import EmailRedactor, PhoneRedactor, SecretRedactor, CreditCardRedactor
+from . import serialization
+from .keywords import KeywordMatcher
+from .redactors import EmailRedactor, PhoneRedactor, SecretRedactor, CreditCardRedactor, CombinedRedactor
 from .semantic import SemanticBlocker
 
 # Constants
 POLICY_FILENAME = "policy.json"
 DEFAULT_MAX_CHARS = 200
+# Max number of distinct prompts whose decision is cached (repeated prompts skip the whole pipeline)
+EVALUATE_CACHE_SIZE = 4096
+
+# Built components shared by every Policy instance in the process, keyed by (policy path, mtime_ns).
+# Re-creating a Policy (e.g. per worker or per request) then costs a dict lookup instead of
+# re-parsing the JSON, re-compiling the matchers and re-loading the semantic model.
+_COMPONENT_CACHE: Dict[tuple, Dict[str, Any]] = {}
+_COMPONENT_CACHE_LOCK = threading.Lock()
+# Attributes that make up a loaded policy (what gets stored in the cache)
+_COMPONENT_ATTRS = (
+    "rules", "keyword_matcher", "redactors", "combined_redactor", "semantic_blocker", "semantic_before_redaction"
+)
 
 class Policy:
     """Manages policy rules loaded from a JSON file and assign the required action."""
     
     def __init__(self, policy_path: Optional[Path] = None):
         """Initialize the Policy instance by loading policy rules from a JSON file."""
-        self.policy_file_path = Path(__file__).parent.parent / POLICY_FILENAME
+        self.policy_file_path = Path(policy_path) if policy_path else Path(__file__).parent.parent / POLICY_FILENAME
 
         self.rules = {}
         self.redactors = {}
+        self.combined_redactor = None
+        self.keyword_matcher = None
         self.semantic_blocker = None
+        self.semantic_before_redaction = True
+        # mtime of the policy file that is currently loaded (used to skip no-op reloads)
+        self._policy_mtime_ns = None
+        # Per instance LRU of decisions, replaced whenever a new policy is applied
+        self._evaluate_cached = self._new_evaluate_cache()
 
         # Load the policy rules and setup redactors on startup
         self.load_policy()
@@ -30,15 +52,43 @@ class Policy:
     def load_policy(self):
         """Load rules and configure redactors. Can be called at runtime to reload."""
         try:
-            with open(self.policy_file_path, "r", encoding="utf-8") as f:
-                self.rules = json.load(f)
-            
-            print(f"Loaded {len(self.rules)} rules from {self.policy_file_path}")
-            
-            # Re-initialize redactors based on new config
-            self._configure_components()
+            # Nothing changed on disk since the last load, keep the current components
+            mtime_ns = self.policy_file_path.stat().st_mtime_ns
+            if mtime_ns == self._policy_mtime_ns:
+                print(f"Policy file {self.policy_file_path} unchanged, skipping reload")
+                return
+
+            cache_key = (str(self.policy_file_path), mtime_ns)
+            with _COMPONENT_CACHE_LOCK:
+                components = _COMPONENT_CACHE.get(cache_key)
+
+                if components is None:
+                    # NOTE: The raw bytes are parsed directly (no text decoding step with orjson)
+                    raw_policy = self.policy_file_path.read_bytes()
+                    self.rules = serialization.loads(raw_policy)
+                    
+                    print(f"Loaded {len(self.rules)} rules from {self.policy_file_path}")
+                    
+                    # Re-initialize redactors based on new config
+                    self._configure_components()
+
+                    # Only the latest version of each file is kept (older ones hold stale models)
+                    for key in [key for key in _COMPONENT_CACHE if key[0] == cache_key[0]]:
+                        del _COMPONENT_CACHE[key]
+                    _COMPONENT_CACHE[cache_key] = {name: getattr(self, name) for name in _COMPONENT_ATTRS}
+
+                else:
+                    print(f"Reusing components already built for {self.policy_file_path}")
+                    for name, value in components.items():
+                        setattr(self, name, value)
+
+            self._policy_mtime_ns = mtime_ns
+            # Decisions made with the old rules are no longer valid.
+            # NOTE: A fresh cache, not cache_clear(): an evaluation still running under the old rules
+            # would write its decision into a cleared cache after the clear and keep it there for good.
+            self._evaluate_cached = self._new_evaluate_cache()
             
-        except (FileNotFoundError, json.JSONDecodeError) as e:
+        except (FileNotFoundError, serialization.JSONDecodeError) as e:
             # If we can't read the security rules, we must not start.
             print(f"CRITICAL SECURITY ERROR: Could not load {self.policy_file_path}")
             raise e
@@ -46,29 +96,68 @@ class Policy:
     def evaluate_prompt(self, prompt):
         """
         Main entry point. Evaluates a prompt against all active rules.
+        Decisions are cached per prompt. NOTE: The returned dict is shared, callers must not modify it.
+        """
+        # While the semantic model is loading its verdict is missing, so don't remember those decisions
+        if self.semantic_blocker is not None and self.semantic_blocker.is_loading():
+            return self._evaluate(prompt)
+
+        # Too long prompts are blocked by an O(1) length check, caching them would only pin large keys
+        if len(prompt) > self.rules.get("max_prompt_chars", DEFAULT_MAX_CHARS):
+            return self._evaluate(prompt)
+
+        return self._evaluate_cached(prompt)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit / miss counters of the decision cache (and of the semantic caches, when enabled)."""
+        stats = {"evaluate": self._evaluate_cached.cache_info()._asdict()}
+        if self.semantic_blocker is not None:
+            stats["semantic"] = self.semantic_blocker.cache_stats()
+        return stats
+
+    def _new_evaluate_cache(self):
+        """Return an empty LRU of decisions in front of _evaluate."""
+        return lru_cache(maxsize=EVALUATE_CACHE_SIZE)(self._evaluate)
+
+    def _evaluate(self, prompt):
+        """
+        Evaluates a prompt against all active rules (uncached).
         1. Check Hard Blocks (Keywords, Length)
         2. Check Semantic Blocks (AI)
         3. Apply Redaction (PII)
         4. Allow (Default)
+
+        NOTE: With "semantic_blocking.run_before_redaction" set to false, steps 2 and 3 are swapped:
+        redacted prompts skip the model, but are then never checked for dangerous intent.
         """
+        # Lowercase once, shared by the keyword matcher and the semantic prefilter
+        # NOTE: Redactors work on the original prompt (the redacted text must keep its case)
+        prompt_lower = prompt.lower()
 
         # 1. BLOCKING CHECK (Highest Priority)
-        block_result = self._check_blocking(prompt)
+        block_result = self._check_blocking(prompt, prompt_lower)
         if block_result:
             return block_result
 
-        # 2. SEMANTIC BLOCKING (AI, between medium and high priority)
+        # 2. SEMANTIC BLOCKING (AI) - default position, PII in a prompt must not skip the intent check
         # Another layer of security 
-        semantic_result = self._check_semantic_blocking(prompt)
-        if semantic_result:
-            return semantic_result
+        if self.semantic_before_redaction:
+            semantic_result = self._check_semantic_blocking(prompt, prompt_lower)
+            if semantic_result:
+                return semantic_result
 
         # 3. REDACTION CHECK (Medium Priority)
         redact_result = self._apply_redaction(prompt)
         if redact_result:
             return redact_result
 
-        # 4. ALLOW (Default)
+        # 4. SEMANTIC BLOCKING (AI) - only when configured to run after redaction
+        if not self.semantic_before_redaction:
+            semantic_result = self._check_semantic_blocking(prompt, prompt_lower)
+            if semantic_result:
+                return semantic_result
+
+        # 5. ALLOW (Default)
         return {
             "action": "allow",
             "prompt_out": prompt,
@@ -76,15 +165,20 @@ class Policy:
         }
 
     def _configure_components(self):
-        """Instantiate redactors AND the semantic blocker."""
-        # A. Setup Redactors
+        """Instantiate the keyword matcher, redactors AND the semantic blocker."""
+        # A. Setup Keyword Matcher (built once per load, reused for every prompt)
+        self.keyword_matcher = KeywordMatcher(self.rules.get("banned_keywords", []))
+
+        # B. Setup Redactors
         config = self.rules.get("redaction_rules", {})
         self.redactors = {}
 
+        # Ordered by selectivity: cheap literal triggers first, digit based patterns last
+        # NOTE: The order is also the match priority inside the combined regex
         redactor_map = {
+            "redact_secrets": ("Secret", SecretRedactor),
             "redact_emails": ("Email", EmailRedactor),
             "redact_phone_numbers": ("Phone", PhoneRedactor),
-            "redact_secrets": ("Secret", SecretRedactor),
             "redact_credit_cards": ("CreditCard", CreditCardRedactor),
         }
 
@@ -92,34 +186,38 @@ class Policy:
             if config.get(config_key, False):
                 self.redactors[name] = cls()
 
-        # B. Setup Semantic Blocker
+        # All active redactors are fused into one regex so the prompt is scanned once
+        self.combined_redactor = CombinedRedactor(self.redactors)
+
+        # C. Setup Semantic Blocker
         semantic_config = self.rules.get("semantic_blocking", {})
         if semantic_config.get("enabled", False):
             phrases = semantic_config.get("banned_phrases", [])
             threshold = semantic_config.get("threshold", 0.6)
-            self.semantic_blocker = SemanticBlocker(phrases, threshold)
+            ngram_prefilter = semantic_config.get("ngram_prefilter", False)
+            self.semantic_before_redaction = semantic_config.get("run_before_redaction", True)
+            blocker = self.semantic_blocker
+
+            # Re-loading the model is the most expensive thing we do, reuse the resident one when possible.
+            # NOTE: A new blocker, the old one is never changed: other Policy instances built from the
+            # previous file share it through _COMPONENT_CACHE.
+            source = blocker if blocker is not None and not blocker.load_failed else None
+            self.semantic_blocker = SemanticBlocker(phrases, threshold, ngram_prefilter, source)
         else:
             self.semantic_blocker = None
+            self.semantic_before_redaction = True
 
         print(f"Active Redactors: {list(self.redactors.keys())}")
         print(f"Semantic Blocking: {'Enabled' if self.semantic_blocker else 'Disabled'}")
         
     def _apply_redaction(self, prompt: str) -> Optional[Dict[str, Any]]:
         """Apply redactions to a prompt."""
-        current_prompt = prompt
-        affected_types = []
-
-        # Run prompt through the active redactors
-        for name, redactor in self.redactors.items():
-            original_prompt = current_prompt
-            current_prompt = redactor.redact_text(current_prompt)
-            
-            # If text changed, record which redactor did it
-            if current_prompt != original_prompt:
-                affected_types.append(name)
+        # Run prompt through the active redactors (single pass), recording which ones fired
+        current_prompt, affected_types = self.combined_redactor.redact(prompt)
 
         # If any redaction happened, return the modified result
-        if current_prompt != prompt:
+        # NOTE: Checking the fired redactors is O(1), comparing the prompts would re-scan the whole string
+        if affected_types:
             return {
                 "action": "redact",
                 "prompt_out": current_prompt,
@@ -128,7 +226,7 @@ class Policy:
         
         return None
 
-    def _check_semantic_blocking(self, prompt: str) -> Optional[Dict[str, Any]]:
+    def _check_semantic_blocking(self, prompt: str, prompt_lower: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """Check against the AI model."""
         if not self.semantic_blocker:
             return None
@@ -139,7 +237,7 @@ class Policy:
         How to check if a prompt is blocked => similarity score > threshold (can be configured in the policy.json file)
         """
         
-        is_blocked, score = self.semantic_blocker.check_blocking(prompt)
+        is_blocked, score = self.semantic_blocker.check_blocking(prompt, prompt_lower)
         
         # The AI model response
         if is_blocked:
@@ -152,7 +250,7 @@ class Policy:
         # None means the AI model sees nothing wrong with the prompt
         return None
 
-    def _check_blocking(self, prompt: str) -> Optional[Dict[str, Any]]:
+    def _check_blocking(self, prompt: str, prompt_lower: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """Check if a prompt contains any blocked keywords."""
 
         # Check 1: Length
@@ -165,11 +263,11 @@ class Policy:
             }
 
         # Check 2: Banned Keywords
-        prompt_lower = prompt.lower()
-        found_blocked_keywords = [
-            keyword for keyword in self.rules["banned_keywords"] 
-            if keyword.lower() in prompt_lower  
-        ]
+        if not self.keyword_matcher.keywords:
+            return None
+
+        # NOTE: The matcher lowercases the prompt itself unless the lowered copy is passed in
+        found_blocked_keywords = self.keyword_matcher.find(prompt, prompt_lower)
 
         if found_blocked_keywords:
             return {
@@ -184,6 +282,9 @@ class Policy:
 if __name__ == "__main__":
     # Run this in terminal -> python -m core.policy
     policy = Policy()
+    # The semantic model loads in the background, wait for it so the demo shows semantic blocks
+    if policy.semantic_blocker:
+        policy.semantic_blocker.wait_until_ready()
     print(policy.evaluate_prompt("my email is test@example.com and my phone number is 1234567890"))
     print(policy.evaluate_prompt("My name is John Doe and my api key is SECRET{1234567890}"))
     print(policy.evaluate_prompt("i woke up in the morning and ate breakfast"))
@@ -12,38 +12,225 @@ It is a privacy & security filter that sits in the data flow.
 """
 
 import re
+from typing import Dict, List, Tuple
+
+try:
+    # NOTE: RE2 is a DFA based engine, its run time is linear in the text length whatever the pattern
+    import re2
+    HAS_RE2 = True
+except ImportError:
+    HAS_RE2 = False
+
+# Patterns are compiled once at import time and shared by every redactor instance
+EMAIL_PATTERN = re.compile(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+")
+PHONE_PATTERN = re.compile(r"\b\d{3}[-.]?\d{3}[-.]?\d{4}\b")
+SECRET_PATTERN = re.compile(r"SECRET\{[^}]*\}")
+# Card candidates, in the shapes cards are actually written: 13-19 digits in one block, 4-4-4-4
+# (Visa, Mastercard, ...) or 4-6-5 / 4-6-4 (Amex, Diners), split by a space or a dash.
+# NOTE: A candidate never spans neighbouring numbers, so a trailing CVV or a second card stays out
+# of it, and "123 555-123-4567" is left to the phone pattern. The checksum is checked in validate().
+# NOTE: \b (not lookarounds) so RE2 runs the same pattern. Both ends are digits, so \b means
+# "not glued to a word character" there. RE2's \b is ASCII only, like the bytes patterns.
+CARD_PATTERN = re.compile(r"\b(?:\d{13,19}|\d{4}(?:[ -]\d{4}){3}|\d{4}[ -]\d{6}[ -]\d{4,5})\b")
+
+# Used to cheaply check if a text contains any digit before running the digit based regexes
+DIGITS = frozenset("0123456789")
+
+# Prompts at least this long are redacted with RE2 (when installed). Below it the backtracking `re`
+# engine is ~3x faster, and the patterns can't blow up on so little text.
+RE2_MIN_LENGTH = 2048
+
+def luhn_valid(number):
+    """Luhn checksum over the digits of a card number (separators already removed)."""
+    total = 0
+    for index, char in enumerate(reversed(number)):
+        digit = int(char)
+        # Every second digit from the right is doubled (and 9 subtracted if it went above 9)
+        if index & 1:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        total += digit
+    return total % 10 == 0
 
 class Redactor:
     """Base class for text redaction operations."""
+
+    # Subclasses set the compiled pattern and the placeholder that replaces each match
+    PATTERN = None
+    TAG = ""
+    # Regex character class body of the characters every match must contain (None = no such character)
+    TRIGGERS = None
+    # RE2 compatible source of PATTERN, when it differs (None = PATTERN.pattern)
+    RE2_SOURCE = None
     
-    def redact_text(self, text):
-        """Redact sensitive information from text. Base implementation returns text unchanged."""
-        return text
+    def might_match(self, text):
+        """Cheap prefilter. Returns False only when the pattern cannot possibly match the text."""
+        return True
 
-class EmailRedactor(Redactor):
-    """Redactor for email addresses in text."""
+    def validate(self, match):
+        """Second check on a regex match (e.g. a checksum). Returning False leaves the match unredacted."""
+        return True
     
     def redact_text(self, text):
-        """Replace email addresses with <EMAIL> placeholder."""
-        return re.sub(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+", "<EMAIL>", text)
+        """
+        Redact sensitive information from text. Base implementation returns text unchanged.
+        Returns: (new_text: str, changed: bool)
+        """
+        if self.PATTERN is None or not self.might_match(text):
+            return text, False
+
+        # subn returns the replacement count, so callers never have to compare the strings
+        new_text, count = self.PATTERN.subn(self.TAG, text)
+        return new_text, count > 0
+
+class EmailRedactor(Redactor):
+    """Redactor for email addresses in text. Replaces them with <EMAIL> placeholder."""
+    PATTERN = EMAIL_PATTERN
+    TAG = "<EMAIL>"
+    TRIGGERS = r"@"
+
+    def might_match(self, text):
+        """An email always contains '@'."""
+        return "@" in text
 
 class PhoneRedactor(Redactor):
-    """Redactor for phone numbers in text."""
-    
-    def redact_text(self, text):
-        """Replace phone numbers (e.g., 123-456-7890) with <PHONE> placeholder."""
-        return re.sub(r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b', "<PHONE>", text)
+    """Redactor for phone numbers (e.g., 123-456-7890) in text. Replaces them with <PHONE> placeholder."""
+    PATTERN = PHONE_PATTERN
+    TAG = "<PHONE>"
+    TRIGGERS = r"\d"
+
+    def might_match(self, text):
+        """A phone number always contains digits."""
+        return not DIGITS.isdisjoint(text)
 
 class SecretRedactor(Redactor):
-    """Redactor for secret values in SECRET{...} format."""
-    
-    def redact_text(self, text):
-        """Replace SECRET{...} patterns with <SECRET> placeholder."""
-        return re.sub(r'SECRET\{[^}]*\}', "<SECRET>", text)
+    """Redactor for secret values in SECRET{...} format. Replaces them with <SECRET> placeholder."""
+    PATTERN = SECRET_PATTERN
+    TAG = "<SECRET>"
+    TRIGGERS = r"{"
+
+    def might_match(self, text):
+        """A secret always starts with the literal 'SECRET{'."""
+        return "SECRET{" in text
 
 class CreditCardRedactor(Redactor):
-    """Redactor for credit card numbers in text."""
-    
+    """Redactor for credit card numbers (13-19 digits, Luhn valid) in text. Replaces them with <CARD> placeholder."""
+    PATTERN = CARD_PATTERN
+    TAG = "<CARD>"
+    TRIGGERS = r"\d"
+
+    def might_match(self, text):
+        """A card number always contains digits."""
+        return not DIGITS.isdisjoint(text)
+
+    def validate(self, match):
+        """Keep only candidates that pass the Luhn checksum."""
+        number = match.group()
+        if isinstance(number, bytes):
+            number = number.decode("ascii")
+        return luhn_valid(number.replace(" ", "").replace("-", ""))
+
+    def redact_text(self, text):
+        """Replace valid card numbers. Returns: (new_text: str, changed: bool)"""
+        if not self.might_match(text):
+            return text, False
+
+        changed = False
+
+        def _replace(match):
+            nonlocal changed
+            if not self.validate(match):
+                return match.group()
+            changed = True
+            return self.TAG
+
+        new_text = self.PATTERN.sub(_replace, text)
+        return new_text, changed
+
+class CombinedRedactor(Redactor):
+    """
+    Fuses several redactors into one regex with a named group per redactor.
+    The prompt is scanned once instead of once per redactor.
+    """
+
+    def __init__(self, redactors: Dict[str, Redactor]):
+        """Store the enabled redactors (dict order = match priority)."""
+        self.redactors = dict(redactors)
+        self._tags = {name: redactor.TAG for name, redactor in self.redactors.items()}
+        self._byte_tags = {name: tag.encode("ascii") for name, tag in self._tags.items()}
+        # Group name (as reported by match.lastgroup) -> redactor name. RE2 reports bytes names on bytes patterns.
+        self._group_names = {}
+        for name in self.redactors:
+            self._group_names[name] = self._group_names[name.encode("ascii")] = name
+        # Compiled alternations, keyed by (tuple of redactor names, is bytes pattern, is RE2)
+        self._patterns = {}
+
+        # One character class with the triggers of all redactors, e.g. [@\d{].
+        # A single scan with it rejects most prompts before any per-redactor check runs.
+        self._triggers = None
+        triggers = [redactor.TRIGGERS for redactor in self.redactors.values()]
+        if triggers and None not in triggers:
+            self._triggers = re.compile("[" + "".join(dict.fromkeys(triggers)) + "]")
+
+    def _get_pattern(self, names, as_bytes=False, use_re2=False):
+        """Return the (str or bytes) alternation for the given redactors, compiling it on first use."""
+        key = (names, as_bytes, use_re2)
+        pattern = self._patterns.get(key)
+        if pattern is None:
+            if use_re2:
+                sources = [self.redactors[name].RE2_SOURCE or self.redactors[name].PATTERN.pattern for name in names]
+            else:
+                sources = [self.redactors[name].PATTERN.pattern for name in names]
+            source = "|".join(f"(?P<{name}>{body})" for name, body in zip(names, sources))
+            source = source.encode("ascii") if as_bytes else source
+            try:
+                pattern = re2.compile(source) if use_re2 else re.compile(source)
+            except re2.error if use_re2 else ():
+                # A pattern RE2 can't handle (e.g. lookarounds), stay on the `re` engine for this set
+                pattern = self._get_pattern(names, as_bytes)
+            self._patterns[key] = pattern
+        return pattern
+
+    def redact(self, text: str) -> Tuple[str, List[str]]:
+        """Redact text in a single pass. Returns the new text and the names of the redactors that fired."""
+        if self._triggers is not None and self._triggers.search(text) is None:
+            return text, []
+
+        # Only keep the alternatives whose trigger is present in the text (most prompts have none)
+        names = tuple(name for name, redactor in self.redactors.items() if redactor.might_match(text))
+        if not names:
+            return text, []
+
+        found = set()
+        # ASCII prompts (the vast majority) are redacted as bytes, which skips the Unicode handling of
+        # the str engine (~25% faster). For ASCII input \d and \b behave the same on bytes and str.
+        as_bytes = text.isascii()
+        tags = self._byte_tags if as_bytes else self._tags
+
+        def _replace(match):
+            # lastgroup is the name of the alternative that matched
+            name = self._group_names[match.lastgroup]
+            if not self.redactors[name].validate(match):
+                return match.group()
+            found.add(name)
+            return tags[name]
+
+        # NOTE: found (not the subn count) tells if anything was replaced, rejected matches count too
+        pattern = self._get_pattern(names, as_bytes, HAS_RE2 and len(text) >= RE2_MIN_LENGTH)
+        if as_bytes:
+            new_data = pattern.sub(_replace, text.encode("ascii"))
+            if not found:
+                return text, []
+            text = new_data.decode("ascii")
+        else:
+            new_text = pattern.sub(_replace, text)
+            if not found:
+                return text, []
+            text = new_text
+        return text, [name for name in names if name in found]
+
     def redact_text(self, text):
-        """Replace credit card numbers (13-16 digits) with <CARD> placeholder."""
-        return re.sub(r"\b(?:\d[ -]*?){13,16}\b", "<CARD>", text)
+        """Redact text in a single pass. Returns: (new_text: str, changed: bool)"""
+        new_text, affected_types = self.redact(text)
+        return new_text, bool(affected_types)
@@ -1,55 +1,270 @@
 import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from functools import lru_cache
 try:
-    from sentence_transformers import SentenceTransformer, util
+    import torch
+    from sentence_transformers import SentenceTransformer
     HAS_TRANSFORMERS = True
 except ImportError:
     HAS_TRANSFORMERS = False
 
+# Offline model baked into the docker image (see download_model.py)
+LOCAL_MODEL_PATH = "/app/models/all-MiniLM-L6-v2"
+# int8 (dynamically quantized) ONNX export of the same model, relative to LOCAL_MODEL_PATH
+QUANTIZED_ONNX_FILE = "onnx/model_qint8_avx512_vnni.onnx"
+
+# Max number of distinct prompts whose embedding / score is kept in memory
+ENCODE_CACHE_SIZE = 2048
+
+# Optional prefilter ("ngram_prefilter" in the policy, off by default): a prompt must share at least
+# NGRAM_MIN_OVERLAP character n-grams with the banned phrases before it is worth running the model on it.
+# NOTE: Paraphrases ("hang myself tonight" vs "end my life") share no n-grams, the prefilter lets them through.
+NGRAM_SIZE = 4
+NGRAM_MIN_OVERLAP = 2
+
+# Micro-batching of concurrent prompt encodes (see BatchedEncoder)
+MAX_BATCH_SIZE = 32
+# 0 = no waiting: a batch is whatever queued up while the previous batch was running
+BATCH_WAIT_MS = 0
+
+def char_ngrams(text, text_lower=None):
+    """Set of lowercased character n-grams (NGRAM_SIZE) of a text (text_lower: text.lower(), if already known)."""
+    text = text.lower() if text_lower is None else text_lower
+    return {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+def select_device():
+    """Pick the fastest available device for the model: CUDA, then Apple MPS, then CPU."""
+    if torch.cuda.is_available():
+        return "cuda"
+
+    mps = getattr(torch.backends, "mps", None)
+    if mps is not None and mps.is_available():
+        return "mps"
+
+    return "cpu"
+
+class BatchedEncoder:
+    """
+    Groups concurrent encode requests into a single model.encode() call.
+    A transformer forward pass on a batch of 16-32 prompts costs far less than 16-32 passes of one.
+    NOTE: Request threads block on a Future while a single worker thread talks to the model.
+    """
+    def __init__(self, model, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=BATCH_WAIT_MS):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.SimpleQueue()
+        threading.Thread(target=self._worker, daemon=True).start()
+
+    def encode(self, text):
+        """Encode a single prompt (normalized embedding), batched with any concurrent callers."""
+        future = Future()
+        self._queue.put((text, future))
+        return future.result()
+
+    def _next_batch(self):
+        """Wait for one request, then collect whatever else arrives within max_wait (up to max_batch_size)."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _worker(self):
+        """Background worker: encode batches forever and hand each row back to its caller."""
+        while True:
+            batch = self._next_batch()
+            try:
+                embeddings = self.model.encode(
+                    [text for text, _ in batch],
+                    convert_to_tensor=True,
+                    normalize_embeddings=True,
+                    batch_size=self.max_batch_size,
+                )
+                for (_, future), embedding in zip(batch, embeddings):
+                    future.set_result(embedding)
+
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+
 class SemanticBlocker:
     """
     Checks if the prompt is semantically similar to banned phrases using AI.
     """
-    def __init__(self, banned_phrases, threshold=0.6):
+    def __init__(self, banned_phrases, threshold=0.6, ngram_prefilter=False, source=None):
+        """
+        source: a blocker whose (loaded or still loading) model is reused instead of loading another copy.
+        NOTE: A blocker is never changed after construction (it may be shared by several policies),
+        a policy reload builds a new one on top of the resident model.
+        """
         self.banned_phrases = banned_phrases
         self.threshold = threshold
+        self.ngram_prefilter = ngram_prefilter
+        self._banned_ngrams = self._build_ngrams(banned_phrases)
         self.model = None
         self.encoded_banned = None
+        self._encoder = None
+
+        # Repeated prompts (retries, templates) skip the transformer entirely.
+        # NOTE: Caches are created per instance, a class level lru_cache would keep every blocker alive.
+        # Prompt embeddings don't depend on the phrases, a blocker built on the same model shares them.
+        if source is not None:
+            self._encode_cached = source._encode_cached
+        else:
+            self._encode_cached = lru_cache(maxsize=ENCODE_CACHE_SIZE)(self._encode)
+        self._score_cached = lru_cache(maxsize=ENCODE_CACHE_SIZE)(self._best_score)
+
+        # Set once the model and the banned phrase embeddings are ready to use
+        self._ready = threading.Event()
+        # Set once the load attempt is over (successful or not)
+        self._load_finished = threading.Event()
+        self.load_failed = False
 
         if not HAS_TRANSFORMERS:
             print("[WARN] Sentence Transformers not installed. Semantic blocking disabled.")
+            self.load_failed = True
+            self._load_finished.set()
             return
 
-        # Check for offline model
-        local_model_path = "/app/models/all-MiniLM-L6-v2"
-        
+        # Model already resident: only the phrases are encoded (milliseconds), right here on the reload path,
+        # so semantic blocking never pauses across a reload
+        if source is not None and source._ready.is_set():
+            self._load(source)
+            return
+
+        # Loading the model takes seconds, do it off the startup / reload path.
+        # NOTE: Until it is ready, check_blocking lets prompts through (the keyword and PII checks still apply).
+        threading.Thread(target=self._load, args=(source,), daemon=True).start()
+
+    def _load(self, source=None):
+        """Load the model (or take it from `source`, once that one is loaded) and pre-encode the banned phrases."""
         try:
-            if os.path.exists(local_model_path):
-                print(f"Loading offline model from {local_model_path}...")
-                self.model = SentenceTransformer(local_model_path)
+            if source is None:
+                model = self._load_model()
+                encoder = BatchedEncoder(model)
             else:
-                print("Offline model not found. Trying internet download...")
-                self.model = SentenceTransformer('all-MiniLM-L6-v2')
+                if not source.wait_until_ready():
+                    raise RuntimeError("the model being reused failed to load")
+                model, encoder = source.model, source._encoder
 
-            self.encoded_banned = self.model.encode(self.banned_phrases, convert_to_tensor=True)
+            # Same phrases on the same model: their embeddings are reused as well
+            if source is not None and source.banned_phrases == self.banned_phrases:
+                encoded_banned = source.encoded_banned
+            else:
+                encoded_banned = self._encode_phrases(model, self.banned_phrases)
+
+            self.encoded_banned = encoded_banned
+            self._encoder = encoder
+            self.model = model
+            self._ready.set()
             print("Semantic Model Loaded Successfully.")
             
         except Exception as e:
             print(f"[ERROR] Failed to load AI model: {e}")
             self.model = None
+            self.load_failed = True
+
+        finally:
+            self._load_finished.set()
+
+    @staticmethod
+    def _build_ngrams(phrases):
+        """Union of the character n-grams of all banned phrases (used by the prefilter)."""
+        ngrams = set()
+        for phrase in phrases:
+            ngrams |= char_ngrams(phrase)
+        return ngrams
+
+    @staticmethod
+    def _encode_phrases(model, phrases):
+        """Encode the banned phrases, L2-normalized so a dot product with a normalized prompt IS the cosine similarity."""
+        return model.encode(phrases, convert_to_tensor=True, normalize_embeddings=True)
+
+    def is_loading(self):
+        """True while the background load is still running."""
+        return not self._load_finished.is_set()
+
+    def cache_stats(self):
+        """Hit / miss counters of the prompt embedding and score caches."""
+        return {
+            "encode": self._encode_cached.cache_info()._asdict(),
+            "score": self._score_cached.cache_info()._asdict(),
+        }
+
+    def wait_until_ready(self, timeout=None):
+        """Block until the model is loaded. Returns False on timeout or if loading failed."""
+        self._load_finished.wait(timeout)
+        return self._ready.is_set()
 
-    def check_blocking(self, text):
+    def _load_model(self):
+        """
+        Load the model on the best available device.
+        On CPU, prefer the quantized ONNX export (int8 kernels, ~2-4x faster).
+        Falls back to the PyTorch weights, and finally to an internet download.
+        """
+        device = select_device()
+        print(f"Semantic model device: {device}")
+
+        # NOTE: The int8 export is a CPU optimization. On a GPU the PyTorch weights are faster, and the
+        # embeddings (and the similarity product) then stay on the device.
+        if device == "cpu" and os.path.exists(os.path.join(LOCAL_MODEL_PATH, QUANTIZED_ONNX_FILE)):
+            try:
+                print(f"Loading quantized ONNX model from {LOCAL_MODEL_PATH}...")
+                return SentenceTransformer(
+                    LOCAL_MODEL_PATH,
+                    backend="onnx",
+                    model_kwargs={"file_name": QUANTIZED_ONNX_FILE},
+                )
+            except Exception as e:
+                # e.g. onnxruntime missing. The PyTorch weights are still there.
+                print(f"[WARN] Could not load ONNX model ({e}). Falling back to PyTorch.")
+
+        if os.path.exists(LOCAL_MODEL_PATH):
+            print(f"Loading offline model from {LOCAL_MODEL_PATH}...")
+            return SentenceTransformer(LOCAL_MODEL_PATH, device=device)
+
+        print("Offline model not found. Trying internet download...")
+        return SentenceTransformer('all-MiniLM-L6-v2', device=device)
+
+    def check_blocking(self, text, text_lower=None):
         """
         Checks if text should be blocked.
+        text_lower: text.lower() if the caller already computed it (reused by the prefilter).
         Returns: (is_blocked: bool, score: float)
         """
-        if self.model is None or self.encoded_banned is None:
+        if not self._ready.is_set():
+            return False, 0.0
+
+        # Opt-in prefilter: prompts sharing (almost) no text with any banned phrase skip the model
+        if self.ngram_prefilter and len(char_ngrams(text, text_lower) & self._banned_ngrams) < NGRAM_MIN_OVERLAP:
             return False, 0.0
 
-        prompt_embedding = self.model.encode(text, convert_to_tensor=True)
-        cosine_scores = util.cos_sim(prompt_embedding, self.encoded_banned)
-        best_match_score = float(cosine_scores.max())
+        best_match_score = self._score_cached(text)
 
         if best_match_score > self.threshold:
             return True, best_match_score
         
-        return False, best_match_score
\ No newline at end of file
+        return False, best_match_score
+
+    def _encode(self, text):
+        """Encode a single prompt into a normalized embedding tensor (batched with concurrent requests)."""
+        return self._encoder.encode(text)
+
+    def _best_score(self, text):
+        """Highest cosine similarity between the prompt and any banned phrase."""
+        prompt_embedding = self._encode_cached(text)
+        # Both sides are already normalized: one matrix-vector product gives all cosine scores.
+        # NOTE: Kept in fp32 on purpose. The banned matrix is tiny (N phrases x 384), so int8 would save
+        # microseconds next to the forward pass, which already runs int8 kernels through the ONNX model.
+        cosine_scores = self.encoded_banned @ prompt_embedding
+        return float(cosine_scores.max())
@@ -0,0 +1,36 @@
+"""
+This module provides a small JSON shim used by the server and the policy loader.
+It uses orjson when installed and falls back to the standard json module, with the same interface:
+dumps() always returns bytes and loads() accepts bytes / bytearray / str.
+"""
+
+import json
+
+try:
+    # NOTE: orjson parses straight from bytes and serializes straight to bytes (no str <-> bytes copies)
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# NOTE: orjson.JSONDecodeError is a subclass of json.JSONDecodeError, callers catch this one for both backends
+JSONDecodeError = json.JSONDecodeError
+
+
+if HAS_ORJSON:
+    # Bound directly (no wrapper frame per call). No option flags: the responses are plain str / int /
+    # dict / list values, which orjson's default (fastest) path handles.
+    dumps = orjson.dumps
+    loads = orjson.loads
+
+else:
+    def dumps(data) -> bytes:
+        """Serialize data to JSON (UTF-8 bytes)."""
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def loads(data):
+        """Parse JSON from bytes, bytearray, memoryview or str."""
+        # json.loads doesn't take a memoryview, copy it to bytes
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
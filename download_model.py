@@ -1,5 +1,5 @@
 # download_model.py
-from sentence_transformers import SentenceTransformer
+from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
 import os
 
 # Define where we want to save the model inside the container
@@ -8,4 +8,11 @@ MODEL_PATH = "/app/models/all-MiniLM-L6-v2"
 print(f"Downloading model to {MODEL_PATH}...")
 model = SentenceTransformer('all-MiniLM-L6-v2')
 model.save(MODEL_PATH)
-print("Model saved successfully!")
\ No newline at end of file
+print("Model saved successfully!")
+
+# Export an int8 ONNX copy next to the PyTorch weights (saved as onnx/model_qint8_avx512_vnni.onnx)
+# NOTE: The semantic blocker prefers this file at runtime, the PyTorch weights stay as a fallback.
+print("Exporting quantized ONNX model...")
+onnx_model = SentenceTransformer(MODEL_PATH, backend="onnx")
+export_dynamic_quantized_onnx_model(onnx_model, "avx512_vnni", MODEL_PATH)
+print("Quantized ONNX model saved successfully!")
\ No newline at end of file
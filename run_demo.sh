@@ -69,7 +69,7 @@ echo ""
 
 # --- TEST 8: Credit Card ---
 echo "[TEST 8] Credit Card Leak"
-curl -s -X POST http://localhost:8000/mitigate -d '{"prompt": "Charge my card 1234 5678 1234 5678 now.", "user_id": "test_08"}'
+curl -s -X POST http://localhost:8000/mitigate -d '{"prompt": "Charge my card 4111 1111 1111 1111 now.", "user_id": "test_08"}'
 echo ""
 echo ""
 
@@ -2,78 +2,269 @@
 The server is responsible for getting requests from the client and processing them according to policy rules
 """
 
+import asyncio
+import email.utils
 import http.server
-import json
+import itertools
+import logging
+import logging.handlers
+import os
+import queue
+import signal
+import socket
 import time
-import socketserver
 import threading
-from collections import deque
 from core.policy import Policy
-from urllib.parse import urlparse, parse_qs
+from core.serialization import dumps as _dumps, loads as _loads, JSONDecodeError
+from urllib.parse import parse_qs
+try:
+    # NOTE: Incremental JSON parser, used to pick a few fields out of large bodies without loading them
+    import ijson
+    HAS_IJSON = True
+except ImportError:
+    HAS_IJSON = False
+
+logger = logging.getLogger(__name__)
+
+# Pending connections the kernel queues before refusing new ones (socketserver defaults to 5)
+LISTEN_BACKLOG = 1024
+
+# Bodies larger than this are stream-parsed (ijson), only the fields below are extracted
+STREAM_PARSE_THRESHOLD = 64 * 1024
+STREAM_FIELDS = frozenset(("prompt", "user_id", "model", "purpose"))
+# ijson events of scalar (leaf) values
+SCALAR_EVENTS = frozenset(("string", "number", "boolean", "null"))
+# Initial size of the per thread response buffer (grows for larger responses)
+RESPONSE_BUFFER_SIZE = 4096
+# Bodies above this size are not copied into the response buffer (sent with a second write instead)
+MAX_BUFFERED_PAYLOAD = 64 * 1024
+# Initial size of the per thread request body buffer (grows up to MAX_BODY for larger bodies)
+BODY_BUFFER_SIZE = 64 * 1024
+# Chunk size used when reading / discarding a streamed body
+STREAM_CHUNK_SIZE = 64 * 1024
+# pids of the forked ICAP worker processes (see fork_icap_workers)
+ICAP_WORKER_PIDS = []
+
+# Constant response bodies, serialized once at import time
+RELOAD_OK = _dumps({"message": "Policy reloaded successfully"})
+# Number of requests kept in the history
+HISTORY_SIZE = 100
+# Fields of a history entry (in response order)
+HISTORY_FIELDS = (
+    "timestamp", "user_id", "model", "purpose", "headers", "prompt_in", "prompt_out", "decision", "reason"
+)
+
+
+class BoundedReader:
+    """File-like view of the next `length` bytes of a stream (never reads into the next keep-alive request)."""
+    # Created per streamed request: no per instance __dict__
+    __slots__ = ("stream", "remaining")
+
+    def __init__(self, stream, length):
+        self.stream = stream
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.stream.read(size) if size else b""
+        self.remaining -= len(data)
+        return data
+
+    def drain(self):
+        """Discard whatever is left of the body (without parsing it)."""
+        while self.remaining and self.read(STREAM_CHUNK_SIZE):
+            pass
+
+
+class HistoryRing:
+    """
+    Fixed size ring of history entries, stored as one column (list) per field (struct of arrays).
+    Logging a request writes one value into each column, no per entry dict is ever kept.
+    The entry dicts of the /history response are only built in snapshot(), for the requested entries.
+
+    NOTE: The column writes take no lock. Each writer claims its own slot from an itertools.count (next() is
+    atomic under the GIL), so concurrent appends never write the same slot. Only publishing the entry takes
+    a tiny lock, so the head only ever moves forward over entries that are all complete. A reader racing a
+    writer that wraps around onto the slot being read may see a mix of two entries in that one row, which is
+    acceptable for a log tail.
+    """
+    __slots__ = ("size", "_columns", "_positions", "_finished", "_publish_lock", "_head", "seq")
+
+    def __init__(self, size=HISTORY_SIZE):
+        self.size = size
+        # field name -> column of `size` values (slot i of every column belongs to the same entry)
+        self._columns = {field: [None] * size for field in HISTORY_FIELDS}
+        # Hands out the (ever growing) position of each append, the slot is position % size
+        self._positions = itertools.count()
+        # Positions whose append finished before an older one did (not published yet)
+        self._finished = set()
+        self._publish_lock = threading.Lock()
+        # End of the published entries: every position below it is complete, what readers read up to
+        self._head = 0
+        # Changes whenever the head moves, tells readers whether anything changed since they last looked
+        self.seq = 0
+
+    def append(self, timestamp, user_id, model, purpose, headers, prompt_in, prompt_out, decision, reason):
+        """Record an entry, overwriting the oldest one when the ring is full."""
+        position = next(self._positions)
+        slot = position % self.size
+        columns = self._columns
+        columns["timestamp"][slot] = timestamp
+        columns["user_id"][slot] = user_id
+        columns["model"][slot] = model
+        columns["purpose"][slot] = purpose
+        columns["headers"][slot] = headers
+        columns["prompt_in"][slot] = prompt_in
+        columns["prompt_out"][slot] = prompt_out
+        columns["decision"][slot] = decision
+        columns["reason"][slot] = reason
+
+        # Publish: move the head over every complete entry in order. An entry finished ahead of a slower,
+        # older one waits in _finished, so readers never see an unfilled slot or a head moving backwards.
+        with self._publish_lock:
+            finished = self._finished
+            finished.add(position)
+            head = self._head
+            while head in finished:
+                finished.remove(head)
+                head += 1
+            self._head = head
+            self.seq = head
+
+    def snapshot(self, limit):
+        """The last `limit` entries as dicts, oldest -> newest."""
+        head = self._head
+        limit = min(limit, head, self.size)
+        cursor = head % self.size
+        start = cursor - limit
+        if start >= 0:
+            window = [column[start:cursor] for column in self._columns.values()]
+        else:
+            # Wraps around: the tail of the columns, then their head
+            window = [column[start:] + column[:cursor] for column in self._columns.values()]
+
+        return [dict(zip(HISTORY_FIELDS, row)) for row in zip(*window)]
+
+    def __len__(self):
+        return min(self._head, self.size)
 
 
 class RequestHandler(http.server.BaseHTTPRequestHandler):
     # NOTE: avoid overriding __init__ since we dont need to setup unique variables for every single request
+    # NOTE: HTTP/1.1 keeps the connection alive between requests (every response must send Content-Length)
+    protocol_version = "HTTP/1.1"
+    server_version = "mitigation/1"
+    # NOTE: Sets TCP_NODELAY in setup(), small responses are sent right away instead of waiting on Nagle
+    disable_nagle_algorithm = True
+
+    # Constant head of JSON responses (status line + fixed headers) per status code, see _prelude
+    _PRELUDES = {}
+    # Largest request body we accept (1 MiB), bigger ones are rejected before reading them
+    MAX_BODY = 1 << 20
+    # Longest prompt we evaluate at all (the policy's own max_prompt_chars block applies below it)
+    MAX_PROMPT_LEN = 16384
+    # One response buffer per handler thread, reused for every response it sends
+    _response_buffers = threading.local()
+    # One request body buffer per handler thread, see _get_json_body
+    _body_buffers = threading.local()
+    # limit -> (history seq, serialized /history response), see _history_payload
+    _history_cache = {}
+    _history_cache_lock = threading.Lock()
+
     # Load the brain (class variable in order to load it once)
     policy = Policy()
 
-    # Keep last 20 history items 
-    history = deque(maxlen=100)
+    # Keep the last HISTORY_SIZE requests
+    history = HistoryRing(HISTORY_SIZE)
+
+    # (second, formatted timestamp) of the last log entry. Bursts within one second format it only once.
+    # NOTE: Swapped as a whole tuple, so concurrent threads always see a matching pair
+    _ts_cache = (0, "")
+    # (second, b"Date: ..." header value) of the last response, same idea for the HTTP Date header
+    _date_cache = (0, b"")
 
     # ========== END POINTS ========== #
     def do_POST(self):
-        if self.path == "/mitigate":
-            self.handle_mitigate()
-
-        elif self.path == "/reload":
-            self.handle_reload()
-
-        else:
-            self.send_error(404, "Not Found")
+        # Route lookup is a single dict get (see _POST_ROUTES at the end of the class)
+        (self._POST_ROUTES.get(self.path) or RequestHandler._not_found)(self)
 
     def do_GET(self):
         """Handle GET requests with support for query parameters."""
-        # Parse the URL cleanly (separates path from query params)
-        parsed_url = urlparse(self.path)
+        # Separate the path from the query params (e.g. /history?n=5), then dispatch on the path
+        path, _, query = self.path.partition("?")
+        handler = self._GET_ROUTES.get(path)
+        if handler is None:
+            self._not_found()
+            return
+        handler(self, query)
 
-        if parsed_url.path == "/history":
-            # Extract 'n' from query params (e.g., ?n=5)
-            query_params = parse_qs(parsed_url.query)
-            
-            try:
-                # Get 'n', default to ['20'], take the first item, convert to int
-                limit = int(query_params.get("n", ["20"])[0])
-            except (ValueError, TypeError):
-                limit = 20
-
-            # Get the data
-            full_history = list(self.history)
-            
-            # If limit is 0 or negative, return everything (or handle as error)
-            if limit > 0:
-                response_data = full_history[-limit:]
-            else:
-                response_data = full_history[-20:]
+    def handle_history(self, query):
+        """Return the last n (default 20) history entries."""
+        # Extract 'n' from query params (e.g., ?n=5)
+        query_params = parse_qs(query)
 
-            self._send_json({"history": response_data})
-        else:
-            self.send_error(404, "Not Found")
+        try:
+            # Get 'n', default to ['20'], take the first item, convert to int
+            limit = int(query_params.get("n", ["20"])[0])
+        except (ValueError, TypeError):
+            limit = 20
+
+        # If limit is 0 or negative, fall back to the default
+        if limit <= 0:
+            limit = 20
+        # Anything above the ring size returns the same entries (also bounds the cache keys)
+        limit = min(limit, self.history.size)
+
+        self._send_json_payload(self._history_payload(limit))
+
+    def handle_stats(self, query):
+        """Hit / miss counters of the decision and semantic caches (for sizing them)."""
+        self._send_json(self.policy.cache_stats())
 
     # ========== HELPER FUNCTIONS ========== #
+    @classmethod
+    def _history_payload(cls, limit):
+        """Serialized /history response for `limit` entries, re-built only when the history changed."""
+        # NOTE: seq is read before the snapshot. If an append slips in between, the cached payload is
+        # newer than its seq and simply gets rebuilt on the next call (never served stale).
+        seq = cls.history.seq
+        with cls._history_cache_lock:
+            cached = cls._history_cache.get(limit)
+        if cached is not None and cached[0] == seq:
+            return cached[1]
+
+        # Copy only the last `limit` entries (oldest -> newest)
+        payload = _dumps({"history": cls.history.snapshot(limit)})
+        with cls._history_cache_lock:
+            cls._history_cache[limit] = (seq, payload)
+        return payload
+
     def handle_mitigate(self):
         """Process the mitigation logic."""
         data = self._get_json_body()
         if data is None:
             return 
 
+        if not isinstance(data, dict):
+            self.send_error(400, "Request body must be a JSON object")
+            return
+
         # Fetch mandatory fields
         prompt = data.get("prompt")
         user_id = data.get("user_id")
 
-        if not prompt or not user_id:
+        # NOTE: The prompt must be a non empty string (the policy runs string operations on it).
+        # user_id may be a string or a number, it is only echoed back and logged.
+        if not (isinstance(prompt, str) and prompt) or not user_id:
             self.send_error(400, "Missing required fields: prompt and user_id")
             return
 
+        # Bound the work (and the history memory) a single request can cause
+        if len(prompt) > self.MAX_PROMPT_LEN:
+            self.send_error(413, f"Prompt too large (max {self.MAX_PROMPT_LEN} characters)")
+            return
+
         # Fetch optional fields
         model = data.get("model", "gpt-4o")
         purpose = data.get("purpose", "general")
@@ -84,6 +275,8 @@ class RequestHandler(http.server.BaseHTTPRequestHandler):
         
         # Create a new entry in the history with FULL context
         self._log_to_history(user_id, prompt, policy_decision, model, purpose, meta_headers)
+        # NOTE: Lazy % formatting, nothing is built when the level is disabled
+        logger.info("mitigate user=%s action=%s", user_id, policy_decision["action"])
 
         # Build the response data for the client
         response_data = {
@@ -99,7 +292,10 @@ class RequestHandler(http.server.BaseHTTPRequestHandler):
         """Handle the reload of the policy."""
         try:
             self.policy.load_policy()
-            self._send_json({"message": "Policy reloaded successfully"})
+            # Each ICAP worker process holds its own policy, they reload on SIGHUP (see reload_on_signal)
+            if ICAP_WORKER_PIDS:
+                signal_icap_workers(signal.SIGHUP)
+            self._send_json_payload(RELOAD_OK)
         except Exception as e:
             self._send_json({"message": f"Failed to reload policy: {str(e)}"}, 500)
 
@@ -107,12 +303,69 @@ class RequestHandler(http.server.BaseHTTPRequestHandler):
         """Helper to read and parse JSON body."""
         try:
             content_length = int(self.headers.get("Content-Length", 0))
-            body = self.rfile.read(content_length)
-            return json.loads(body)
-        except json.JSONDecodeError:
+        except ValueError:
+            self.send_error(400, "Invalid Content-Length")
+            return None
+
+        if content_length < 0:
+            self.send_error(400, "Invalid Content-Length")
+            return None
+
+        # NOTE: Checked before reading anything, the client can't make us allocate an arbitrary amount
+        if content_length > self.MAX_BODY:
+            self.send_error(413, f"Request body too large (max {self.MAX_BODY} bytes)")
+            return None
+
+        try:
+            if HAS_IJSON and content_length > STREAM_PARSE_THRESHOLD:
+                return self._stream_json_fields(content_length)
+
+            # Read into this thread's reusable body buffer (no new allocation per request)
+            # NOTE: The parser copies everything it returns, so the buffer can be overwritten by the next request
+            buffer = getattr(self._body_buffers, "buffer", None)
+            if buffer is None or len(buffer) < content_length:
+                buffer = self._body_buffers.buffer = bytearray(max(content_length, BODY_BUFFER_SIZE))
+
+            with memoryview(buffer) as buffer_view:
+                received = 0
+                while received < content_length:
+                    chunk_size = self.rfile.readinto(buffer_view[received:content_length])
+                    if not chunk_size:
+                        break
+                    received += chunk_size
+
+                with buffer_view[:received] as body:
+                    return _loads(body)
+        except JSONDecodeError:
             self.send_error(400, "Invalid JSON")
             return None
 
+    def _stream_json_fields(self, content_length):
+        """
+        Stream-parse a large body, keeping only the top level STREAM_FIELDS.
+        NOTE: Other fields (e.g. "headers") are never built into Python objects, they are dropped.
+        NOTE: The whole body is parsed, like on the small body path: it must be valid JSON, and when a key
+        appears twice the last value wins (a field can't be swapped by hiding a second copy past a large field).
+        """
+        reader = BoundedReader(self.rfile, content_length)
+        data = {}
+        # NOTE: use_float: non integer numbers come back as float (the default, Decimal, can't be serialized)
+        try:
+            for prefix, event, value in ijson.parse(reader, use_float=True):
+                if prefix in STREAM_FIELDS:
+                    if event in SCALAR_EVENTS:
+                        data[prefix] = value
+                    elif event in ("start_map", "start_array"):
+                        # A later non scalar value replaces an earlier one. It isn't built, the field is dropped.
+                        data.pop(prefix, None)
+        except ijson.JSONError:
+            self.send_error(400, "Invalid JSON")
+            return None
+
+        # The connection is kept alive, the unread part of the body must not be taken for the next request
+        reader.drain()
+        return data
+
     @classmethod
     def _log_to_history(cls, user_id, prompt, policy_decision, model="N/A", purpose="N/A", meta_headers=None):
         """Helper to log the request to the history."""
@@ -121,30 +374,133 @@ class RequestHandler(http.server.BaseHTTPRequestHandler):
         if meta_headers is None:
             meta_headers = {}
 
-        # Create a new entry in the history
-        log_entry = {
-            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
-            "user_id": user_id,
-            "model": model,          
-            "purpose": purpose,      
-            "headers": meta_headers, 
-            "prompt_in": prompt,
-            "prompt_out": policy_decision.get("prompt_out"),
-            "decision": policy_decision["action"],
-            "reason": policy_decision["reason"]
-        }
+        # Reuse the timestamp string if we already formatted this second
+        now = int(time.time())
+        ts_cache = cls._ts_cache
+        if now == ts_cache[0]:
+            timestamp = ts_cache[1]
+        else:
+            timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now))
+            cls._ts_cache = (now, timestamp)
+
+        # Record the entry (recycles the oldest slot of the ring)
+        cls.history.append(
+            timestamp=timestamp,
+            user_id=user_id,
+            model=model,
+            purpose=purpose,
+            headers=meta_headers,
+            prompt_in=prompt,
+            prompt_out=policy_decision.get("prompt_out"),
+            decision=policy_decision["action"],
+            reason=policy_decision["reason"],
+        )
+
+    def log_message(self, format, *args):
+        """Route the per-request access log through logging (debug) instead of a stderr write."""
+        logger.debug("%s - " + format, self.address_string(), *args)
 
-        cls.history.append(log_entry)
+    @classmethod
+    def _fill_response_buffer(cls, parts):
+        """Copy the parts into this thread's response buffer. Returns the number of bytes written."""
+        size = sum(len(part) for part in parts)
+        buffer = getattr(cls._response_buffers, "buffer", None)
+        # NOTE: The buffer only grows. Slice assignments of the same length never reallocate it.
+        if buffer is None or len(buffer) < size:
+            buffer = cls._response_buffers.buffer = bytearray(max(size, RESPONSE_BUFFER_SIZE))
+
+        offset = 0
+        for part in parts:
+            end = offset + len(part)
+            buffer[offset:end] = part
+            offset = end
+        return size
 
     def _send_json(self, data, status=200):
         """Helper to standardize sending JSON response."""
-        self.send_response(status)
-        self.send_header("Content-Type", "application/json")
-        self.end_headers()
-        self.wfile.write(json.dumps(data).encode("utf-8"))
+        self._send_json_payload(_dumps(data), status)
+
+    @classmethod
+    def _date_header(cls):
+        """HTTP Date header value (bytes), formatted at most once per second."""
+        now = int(time.time())
+        date_cache = cls._date_cache
+        if now == date_cache[0]:
+            return date_cache[1]
+
+        value = email.utils.formatdate(now, usegmt=True).encode("ascii")
+        cls._date_cache = (now, value)
+        return value
+
+    @classmethod
+    def _prelude(cls, status):
+        """Status line + fixed headers of a JSON response, built once per status code."""
+        prelude = cls._PRELUDES.get(status)
+        if prelude is None:
+            reason = cls.responses.get(status, ("",))[0]
+            prelude = (
+                f"{cls.protocol_version} {status} {reason}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Server: {cls.server_version}\r\n"
+            ).encode("latin-1")
+            cls._PRELUDES[status] = prelude
+        return prelude
+
+    def _send_json_payload(self, payload, status=200):
+        """Send an already serialized JSON payload (bytes)."""
+        self.log_request(status)
+        head = (
+            self._prelude(status),
+            b"Date: ", self._date_header(),
+            b"\r\nContent-Length: ", str(len(payload)).encode("ascii"),
+            b"\r\n\r\n",
+        )
+
+        # Large body (e.g. a big /history): written as is after the headers. Copying it into the
+        # response buffer would double the peak memory and leave that thread's buffer huge for good.
+        if len(payload) > MAX_BUFFERED_PAYLOAD:
+            size = self._fill_response_buffer(head)
+            with memoryview(self._response_buffers.buffer) as view:
+                self.wfile.write(view[:size])
+            self.wfile.write(payload)
+            return
+
+        # The whole response (headers + body) goes out in a single write() call
+        size = self._fill_response_buffer(head + (payload,))
+        with memoryview(self._response_buffers.buffer) as view:
+            self.wfile.write(view[:size])
+
+    def _not_found(self):
+        """Minimal 404 (no HTML body). A request body is never read, so the connection is closed."""
+        self.log_request(404)
+        self.close_connection = True
+        self.wfile.write(self._RESPONSE_404)
 
-    
-class MockICAPHandler(socketserver.StreamRequestHandler):
+    # Constant 404 response, sent in a single write() call
+    _RESPONSE_404 = b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
+
+    # POST path -> handler (plain functions, called with the handler instance)
+    _POST_ROUTES = {
+        "/mitigate": handle_mitigate,
+        "/reload": handle_reload,
+    }
+
+    # GET path -> handler (called with the handler instance and the raw query string)
+    _GET_ROUTES = {
+        "/history": handle_history,
+        "/stats": handle_stats,
+    }
+
+
+class MitigationHTTPServer(http.server.ThreadingHTTPServer):
+    """Threaded HTTP server with a deep accept backlog, so bursts of new connections aren't refused."""
+    # NOTE: Both are ThreadingHTTPServer defaults already, spelled out since the service relies on them
+    allow_reuse_address = True
+    daemon_threads = True
+    request_queue_size = LISTEN_BACKLOG
+
+
+class MockICAPHandler:
     """
     A minimal mock ICAP adapter that listens on port 1344.
     It reuses the same Policy engine as the HTTP server.
@@ -155,28 +511,55 @@ class MockICAPHandler(socketserver.StreamRequestHandler):
     NOTE: No conversation is happening, like in a http.server request. We need to do the conversation manually.
     NOTE: b"204 .... " => tells python to treat this as raw bytes, not a string.
     NOTE: ISTag = ICAP Service Tag. It tells the proxy this file was scanned and so it doesnt need to ask the server again.
+    NOTE: Runs on an asyncio event loop: one thread serves every connection, waiting on sockets costs no thread.
+          asyncio transports set TCP_NODELAY themselves.
     """
 
-    def handle(self):
+    # Constant responses / headers (the allow path is a single write of a constant)
+    ICAP_204 = b"ICAP/1.0 204 No Content\r\n\r\n"
+    ICAP_200_HEADER = b"ICAP/1.0 200 OK\r\nISTag: \"Mitigation-1.0\"\r\n\r\n"
+    ICAP_500 = b"500 Internal Server Error\r\n"
+    ICAP_413 = b"ICAP/1.0 413 Request Entity Too Large\r\n\r\n"
+    # Longest request line read at all: a MAX_PROMPT_LEN prompt of 4 byte UTF-8 characters, plus the method / URL
+    LINE_LIMIT = RequestHandler.MAX_PROMPT_LEN * 4 + 1024
+
+    @classmethod
+    async def handle(cls, reader, writer):
+        """Serve one ICAP request (one line), then close the connection."""
         try:
-            # 1. Read the raw request data, byte by byte
-            self.data = self.rfile.readline().strip().decode("utf-8")
-            print(f"[ICAP] Received request: {self.data}")
+            # 1. Read the raw request line (kept as bytes until the prompt is located)
+            try:
+                data = (await reader.readline()).strip()
+            except ValueError:
+                # Longer than LINE_LIMIT (the stream limit)
+                writer.write(cls.ICAP_413)
+                return
+            logger.debug("[ICAP] Received request: %r", data)
 
-            if not self.data: return
+            if not data: return
 
             # 2. Extract Prompt
             # Input example: REQMOD icap://server/mitigate PROMPT=Hello World
-            # Look for the "PROMPT=" marker
-            if "PROMPT=" in self.data:
-                # Split only once (1) just in case the prompt itself contains "PROMPT="
-                prompt = self.data.split("PROMPT=", 1)[1]
-            else:
+            # partition splits on the first "PROMPT=" marker only (the prompt itself may contain "PROMPT=")
+            _, marker, prompt = data.partition(b"PROMPT=")
+            if not marker:
                 # Fallack. Use whole line as the prompt
-                prompt = self.data
+                prompt = data
+            # NOTE: Only the prompt is decoded, invalid UTF-8 is replaced instead of failing the request
+            prompt = prompt.decode("utf-8", "replace")
+
+            # Same cap as the HTTP /mitigate end-point (bounds the work, the history and the decision cache)
+            if len(prompt) > RequestHandler.MAX_PROMPT_LEN:
+                writer.write(cls.ICAP_413)
+                return
 
             # 3. Reuse the same policy engine instance
-            decision = RequestHandler.policy.evaluate_prompt(prompt)
+            # NOTE: A semantic check can take tens of ms, that runs on a worker thread so the loop keeps serving
+            policy = RequestHandler.policy
+            if policy.semantic_blocker is not None:
+                decision = await asyncio.to_thread(policy.evaluate_prompt, prompt)
+            else:
+                decision = policy.evaluate_prompt(prompt)
 
             RequestHandler._log_to_history(
                 user_id="icap_client",
@@ -186,25 +569,90 @@ class MockICAPHandler(socketserver.StreamRequestHandler):
                 purpose="mitigation",
                 meta_headers={"protocol": "ICAP/1.0"}
             )
+            logger.info("mitigate user=%s action=%s", "icap_client", decision["action"])
 
             # 4. Send Response 
             # 204 = No modification needed (allow)
             # 200 = Modified version follows (redact/block)
             if decision["action"] == "allow":
-                response = b"ICAP/1.0 204 No Content\r\n\r\n"
+                response = (cls.ICAP_204,)
 
             else:
-                header = b"ICAP/1.0 200 OK\r\nISTag: \"Mitigation-1.0\"\r\n\r\n"
-                response = header + decision["prompt_out"].encode()
+                # Header and body are handed over as separate buffers, no concatenated copy is built
+                # NOTE: On Python 3.12+ the transport sends them with one sendmsg() (scatter-gather) call
+                response = (cls.ICAP_200_HEADER, decision["prompt_out"].encode())
 
-            self.wfile.write(response)
-            print(f"[ICAP] Sent response: {response.decode('utf-8')}")
+            writer.writelines(response)
+            await writer.drain()
+            logger.debug("[ICAP] Sent response: %r", response)
         except Exception as e:
-            print(f"[ICAP] Error: {str(e)}")
-            self.wfile.write(b"500 Internal Server Error\r\n")
+            logger.error("[ICAP] Error: %s", e)
+            writer.write(cls.ICAP_500)
+        finally:
+            writer.close()
+
+
+async def serve_icap(host, port, reuse_port=False):
+    """Run the ICAP listener on the current event loop until cancelled."""
+    # NOTE: The line limit follows the prompt cap (asyncio's default line limit is 64 KiB)
+    icap_server = await asyncio.start_server(
+        MockICAPHandler.handle, host, port, backlog=LISTEN_BACKLOG, limit=MockICAPHandler.LINE_LIMIT,
+        reuse_port=reuse_port or None,
+    )
+    async with icap_server:
+        await icap_server.serve_forever()
+
+
+def fork_icap_workers(count, host, port, log_listener):
+    """
+    Fork `count` extra ICAP worker processes, each with its own event loop on a SO_REUSEPORT socket
+    (the kernel spreads the connections between them). Returns the pids of the workers.
+    NOTE: Must run before any thread is started (only the forking thread survives a fork).
+    NOTE: Each worker has its own copy of the history, ICAP requests served by a worker don't show in /history.
+    """
+    pids = []
+    for _ in range(count):
+        pid = os.fork()
+        if pid == 0:
+            # Worker: only serves ICAP, until it is stopped
+            ICAP_WORKER_PIDS.clear()
+            log_listener.start()
+            try:
+                asyncio.run(serve_icap(host, port, reuse_port=True))
+            except KeyboardInterrupt:
+                pass
+            finally:
+                log_listener.stop()
+                os._exit(0)
+        pids.append(pid)
+    return pids
+
+
+def signal_icap_workers(signum):
+    """Send a signal to every forked ICAP worker (a worker that already exited is skipped)."""
+    for pid in ICAP_WORKER_PIDS:
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            logger.warning("ICAP worker %s is gone, not signalled", pid)
 
 
+def reload_on_signal(signum, frame):
+    """
+    SIGHUP handler: reload the policy (e.g. `kill -HUP <pid>`), same as POST /reload.
+    NOTE: The reload runs on its own thread, a signal handler must not block the main (ICAP) thread.
+    The signal is passed on to the ICAP worker processes (if any), each one holds its own policy.
+    """
+    signal_icap_workers(signum)
 
+    def _reload():
+        try:
+            RequestHandler.policy.load_policy()
+            logger.info("Policy reloaded (signal %s)", signum)
+        except Exception as e:
+            logger.error("Failed to reload policy on signal %s: %s", signum, e)
+
+    threading.Thread(target=_reload, daemon=True).start()
 
 
 if __name__ == "__main__":
@@ -216,18 +664,42 @@ if __name__ == "__main__":
           This code manages both servers at the same time. One Manager (Threading) keeping them both alive.
 
           Background Thread: Handles HTTP requests on port 8000.
-          Main Thread: Handles ICAP requests on port 1344.
+          Main Thread: Handles ICAP requests on port 1344 (asyncio event loop).
     '''
 
-    # 1. Configure HTTP Server (Port 8000)
-    http_server = http.server.HTTPServer(("0.0.0.0", 8000), RequestHandler)
+    # 0. Configure logging
+    # NOTE: Request threads only put records on a queue, the listener thread does the actual (blocking) writes
+    log_queue = queue.SimpleQueue()
+    log_listener = logging.handlers.QueueListener(log_queue, logging.StreamHandler())
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+        handlers=[logging.handlers.QueueHandler(log_queue)],
+    )
+
+    # NOTE: The policy (rules, matchers, model) is built once at import time, before any worker is
+    # forked, so forked workers share it copy-on-write. SIGHUP reloads it without restarting.
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, reload_on_signal)
+
+    # Optional ICAP worker processes (ICAP_WORKERS=N, default 1 = ICAP runs in this process only)
+    icap_workers = int(os.environ.get("ICAP_WORKERS", "1"))
+    if icap_workers > 1 and not (hasattr(os, "fork") and hasattr(socket, "SO_REUSEPORT")):
+        logger.warning("ICAP_WORKERS needs fork() and SO_REUSEPORT, running a single ICAP worker")
+        icap_workers = 1
+    if icap_workers > 1 and RequestHandler.policy.semantic_blocker is not None:
+        # The model's worker threads (and torch's thread pools) don't survive a fork
+        logger.warning("ICAP_WORKERS is not supported with semantic blocking, running a single ICAP worker")
+        icap_workers = 1
+    ICAP_WORKER_PIDS.extend(fork_icap_workers(icap_workers - 1, "0.0.0.0", 1344, log_listener))
+    log_listener.start()
 
-    # 2. Configure ICAP Server (Port 1344)
-    socketserver.TCPServer.allow_reuse_address = True
-    icap_server = socketserver.TCPServer(("0.0.0.0", 1344), MockICAPHandler)
+    # 1. Configure HTTP Server (Port 8000)
+    # NOTE: One thread per connection, so a slow request (e.g. semantic model) doesn't block the others
+    http_server = MitigationHTTPServer(("0.0.0.0", 8000), RequestHandler)
 
-    # 3. Run them in parallel using threads
-    print("Server started on port 8000...")
+    # Run them in parallel (HTTP on a thread, ICAP on the main thread's event loop)
+    logger.info("Server started on port 8000...")
     # Run the http server in a separate thread, let the ICAP server run in the main thread
     # NOTE: Non-blocking operation. The main thread can still handle ICAP requests.
     http_thread = threading.Thread(target=http_server.serve_forever)
@@ -235,11 +707,14 @@ if __name__ == "__main__":
     http_thread.daemon = True
     http_thread.start()
 
-    print("Starting ICAP (Mock) Server on port 1344...")
+    # 2. Run the ICAP Server (Port 1344)
+    logger.info("Starting ICAP (Mock) Server on port 1344...")
     try:
         # Main thread runs ICAP
-        icap_server.serve_forever()
+        asyncio.run(serve_icap("0.0.0.0", 1344, reuse_port=icap_workers > 1))
     except KeyboardInterrupt:
-        print("\nStopping servers...")
-        icap_server.shutdown()
-        http_server.shutdown()
\ No newline at end of file
+        logger.info("Stopping servers...")
+        http_server.shutdown()
+    finally:
+        signal_icap_workers(signal.SIGTERM)
+        log_listener.stop()
\ No newline at end of file
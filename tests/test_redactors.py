@@ -0,0 +1,82 @@
+"""Regression tests for the credit card redactor. Run with: python -m unittest"""
+
+import unittest
+
+from core.redactors import HAS_RE2, RE2_MIN_LENGTH, CombinedRedactor, CreditCardRedactor, PhoneRedactor
+
+
+class CreditCardRedactorTest(unittest.TestCase):
+    """A card followed by a CVV or by a second card must still be redacted."""
+
+    CASES = {
+        "card 4111111111111111 123": "card <CARD> 123",
+        "card 4111 1111 1111 1111 123": "card <CARD> 123",
+        "cards: 4111111111111111 5500000000000004": "cards: <CARD> <CARD>",
+        "card 4111-1111-1111-1111": "card <CARD>",
+        "amex 3782 822463 10005": "amex <CARD>",
+        # Not Luhn valid / glued to a word: left alone
+        "order 1234567890123": "order 1234567890123",
+        "card 4111111111111111abc": "card 4111111111111111abc",
+    }
+
+    def test_redact_text(self):
+        redactor = CreditCardRedactor()
+        for text, expected in self.CASES.items():
+            with self.subTest(text=text):
+                self.assertEqual(redactor.redact_text(text), (expected, expected != text))
+
+    def test_combined_redactor(self):
+        # Covers both the bytes (ASCII) and the str (non ASCII) code paths
+        redactor = CombinedRedactor({"Phone": PhoneRedactor(), "CreditCard": CreditCardRedactor()})
+        for text, expected in self.CASES.items():
+            for prefix in ("", "é "):
+                with self.subTest(text=prefix + text):
+                    new_text, affected_types = redactor.redact(prefix + text)
+                    self.assertEqual(new_text, prefix + expected)
+                    self.assertEqual(affected_types, ["CreditCard"] if expected != text else [])
+
+
+class PhoneAndCardTest(unittest.TestCase):
+    """Numbers next to a phone number must not hide it inside a card candidate."""
+
+    CASES = {
+        "room 123 555-123-4567": ("room 123 <PHONE>", ["Phone"]),
+        "ref 2024 555-123-4567 thanks": ("ref 2024 <PHONE> thanks", ["Phone"]),
+        "card 4111111111111111 call 555-123-4567": ("card <CARD> call <PHONE>", ["Phone", "CreditCard"]),
+    }
+
+    def test_combined_redactor(self):
+        redactor = CombinedRedactor({"Phone": PhoneRedactor(), "CreditCard": CreditCardRedactor()})
+        for text, expected in self.CASES.items():
+            for prefix in ("", "é "):
+                with self.subTest(text=prefix + text):
+                    new_text, affected_types = redactor.redact(prefix + text)
+                    self.assertEqual((new_text, affected_types), (prefix + expected[0], expected[1]))
+
+
+class LongPromptTest(unittest.TestCase):
+    """Prompts of RE2_MIN_LENGTH+ characters take the RE2 path (when installed), it must redact the same."""
+
+    CASES = {
+        "x1 4111 1111 1111 1111": "x1 <CARD>",
+        "v2 4111-1111-1111-1111": "v2 <CARD>",
+        "x4111111111111111": "x4111111111111111",
+        "room 123 555-123-4567": "room 123 <PHONE>",
+    }
+
+    def test_combined_redactor(self):
+        redactor = CombinedRedactor({"Phone": PhoneRedactor(), "CreditCard": CreditCardRedactor()})
+        padding = "." * RE2_MIN_LENGTH
+        for text, expected in self.CASES.items():
+            with self.subTest(text=text):
+                self.assertEqual(redactor.redact(padding + " " + text)[0], padding + " " + expected)
+
+    @unittest.skipUnless(HAS_RE2, "google-re2 not installed")
+    def test_uses_re2(self):
+        redactor = CombinedRedactor({"CreditCard": CreditCardRedactor()})
+        redactor.redact("." * RE2_MIN_LENGTH + " 4111111111111111")
+        self.assertEqual(type(redactor._patterns[(("CreditCard",), True, True)]).__module__.split(".")[0], "re2")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+"""End-to-end tests of the HTTP end-points, against a server on an ephemeral port. Run with: python -m unittest"""
+
+import http.client
+import json
+import threading
+import unittest
+
+from server import HAS_IJSON, STREAM_PARSE_THRESHOLD, MitigationHTTPServer, RequestHandler
+
+
+class MitigateTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MitigationHTTPServer(("127.0.0.1", 0), RequestHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def post(self, body):
+        connection = http.client.HTTPConnection(*self.server.server_address)
+        try:
+            connection.request("POST", "/mitigate", body, {"Content-Type": "application/json"})
+            response = connection.getresponse()
+            return response.status, response.read()
+        finally:
+            connection.close()
+
+    @staticmethod
+    def duplicate_prompt_body(padding):
+        """A body whose "prompt" key appears twice, with `padding` characters in between."""
+        return (
+            '{"prompt":"hello","user_id":1,"model":"m","purpose":"p",'
+            f'"headers":{{"x":"{"y" * padding}"}},"prompt":"I want to kill him"}}'
+        ).encode()
+
+    @unittest.skipUnless(HAS_IJSON, "ijson not installed")
+    def test_duplicate_key_same_verdict_on_both_paths(self):
+        # The last "prompt" wins whether the body is parsed whole or streamed
+        small = self.duplicate_prompt_body(16)
+        large = self.duplicate_prompt_body(STREAM_PARSE_THRESHOLD)
+        self.assertLessEqual(len(small), STREAM_PARSE_THRESHOLD)
+        self.assertGreater(len(large), STREAM_PARSE_THRESHOLD)
+
+        for body in (small, large):
+            status, payload = self.post(body)
+            self.assertEqual(status, 200)
+            self.assertEqual(json.loads(payload)["action"], "block")
+
+    @unittest.skipUnless(HAS_IJSON, "ijson not installed")
+    def test_streamed_body_must_be_valid_json(self):
+        body = self.duplicate_prompt_body(STREAM_PARSE_THRESHOLD)[:-1] + b"]"
+        status, _ = self.post(body)
+        self.assertEqual(status, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()